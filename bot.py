@@ -8,9 +8,15 @@ Usage:
   2. Run: python bot.py
 """
 import asyncio
+import hashlib
+import json
 import logging
+import os
 import re
+import shutil
 import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
 from pathlib import Path
 
 from telegram import Update
@@ -25,8 +31,13 @@ from telegram.error import TelegramError
 
 from config import load_config, Config
 from pipeline.downloader import download_video, DownloadError
-from pipeline.transcriber import load_whisper_model, transcribe_audio, TranscriptionError
-from pipeline.highlight_detector import find_highlights, NoHighlightsError
+from pipeline.transcriber import load_whisper_model, transcribe_audio_batch, TranscriptionError
+from pipeline.highlight_detector import (
+    find_highlights,
+    compute_audio_energy,
+    detect_scene_changes,
+    NoHighlightsError,
+)
 from pipeline.video_editor import process_all_clips
 from utils.file_utils import setup_logging, temp_working_dir, format_duration
 
@@ -34,31 +45,294 @@ logger = logging.getLogger(__name__)
 
 URL_PATTERN = re.compile(r"https?://\S+", re.IGNORECASE)
 
+# All transcription requests are funneled through one queue so concurrent
+# jobs share a single batched Whisper call instead of each spinning up its
+# own CPU-heavy session.
+TRANSCRIBE_BATCH_SIZE = 4
+TRANSCRIBE_BATCH_WINDOW = 0.25  # seconds to wait for more requests to coalesce
+
+# Clip uploads overlap their network RTTs, but stay well under Telegram's
+# per-bot rate ceiling.
+MAX_CONCURRENT_UPLOADS = 3
+
+# Maximum number of URL entries kept in the rendered-clip cache.
+CLIP_CACHE_MAX_ENTRIES = 200
+
+CAPTION_TMPL = "🎬 Clip {i}/{n} | {dur} | 📍 {start}\n💡 {reason}"
+
+# Maximum number of clip-digest → Telegram file_id entries kept in memory.
+FILE_ID_CACHE_MAX = 1000
+
+
+# ---------------------------------------------------------------------------
+# Rendered-clip cache
+# ---------------------------------------------------------------------------
+# Viral URLs tend to be submitted by many users; a cache hit skips the whole
+# download → transcribe → highlight → encode pipeline and goes straight to
+# the upload step.
+
+def _clip_cache_dir(config: Config, url: str) -> Path:
+    key = hashlib.sha256(url.encode()).hexdigest()[:16]
+    return config.output_dir / "cache" / key
+
+
+def _clip_cache_lookup(config: Config, url: str) -> list | None:
+    """Return [(path, caption), ...] for a previously rendered URL, or None."""
+    manifest_path = _clip_cache_dir(config, url) / "manifest.json"
+    try:
+        data = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return None
+
+    items = []
+    for entry in data.get("clips", []):
+        path = manifest_path.parent / entry["file"]
+        if not path.exists():
+            return None
+        items.append((path, entry["caption"]))
+    return items or None
+
+
+def _clip_cache_store(config: Config, url: str, clips: list, captions: list) -> None:
+    """Move finished clips into the cache and write the manifest."""
+    cache_dir = _clip_cache_dir(config, url)
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        manifest_clips = []
+        for clip, caption in zip(clips, captions):
+            shutil.move(str(clip.path), str(cache_dir / clip.path.name))
+            manifest_clips.append({"file": clip.path.name, "caption": caption})
+        (cache_dir / "manifest.json").write_text(
+            json.dumps({"url": url, "clips": manifest_clips}), encoding="utf-8"
+        )
+    except OSError as e:
+        logger.warning("Could not store clips in cache: %s", e)
+
+
+def _clip_cache_evict(config: Config, max_entries: int = CLIP_CACHE_MAX_ENTRIES) -> None:
+    """Drop the oldest cache entries (by mtime) beyond max_entries."""
+    cache_root = config.output_dir / "cache"
+    if not cache_root.is_dir():
+        return
+    entries = sorted(cache_root.iterdir(), key=lambda p: p.stat().st_mtime)
+    for stale in entries[:-max_entries] if len(entries) > max_entries else []:
+        shutil.rmtree(stale, ignore_errors=True)
+        logger.info("Evicted cached clips: %s", stale.name)
+
+
+# ---------------------------------------------------------------------------
+# Transcription queue
+# ---------------------------------------------------------------------------
+
+async def _transcription_worker(app) -> None:
+    """Drain the transcription queue, coalescing pending requests into batches."""
+    queue = app.bot_data["transcribe_queue"]
+    model = app.bot_data["whisper_model"]
+    config = app.bot_data["config"]
+
+    while True:
+        batch = [await queue.get()]
+        deadline = time.monotonic() + TRANSCRIBE_BATCH_WINDOW
+        while len(batch) < TRANSCRIBE_BATCH_SIZE:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        paths = [audio_path for audio_path, _ in batch]
+        try:
+            results = await asyncio.to_thread(
+                transcribe_audio_batch, paths, model, config.whisper_beam_size
+            )
+        except Exception as e:
+            # Per-input failures come back inside the result list; only a
+            # failure of the batch call itself lands here and fails everyone.
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            continue
+
+        # Each element is a TranscriptResult or the exception its input
+        # raised — resolve every future individually so one user's bad
+        # audio doesn't fail the jobs it was coalesced with.
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+async def _request_transcription(context: ContextTypes.DEFAULT_TYPE, audio_path):
+    """Submit an audio file to the shared transcription queue and await the result."""
+    future = asyncio.get_running_loop().create_future()
+    await context.application.bot_data["transcribe_queue"].put((audio_path, future))
+    return await future
+
+
+async def _post_init(app) -> None:
+    """Start background tasks once the application's event loop is running."""
+    # Bound CPU-heavy pipeline stages so N concurrent jobs queue up instead
+    # of oversubscribing the cores and slowing everyone down.
+    app.bot_data["cpu_sem"] = asyncio.Semaphore(max(1, (os.cpu_count() or 2) // 2))
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=os.cpu_count()))
+
+    # Job admission control: one job per user, bounded total concurrency
+    config = app.bot_data["config"]
+    app.bot_data["active_users"] = set()
+    app.bot_data["job_sem"] = asyncio.Semaphore(config.max_concurrent_jobs)
+
+    # clip sha256 -> Telegram file_id; re-sends of identical bytes skip upload
+    app.bot_data["clip_file_ids"] = {}
+
+    app.bot_data["transcribe_queue"] = asyncio.Queue()
+    app.create_task(_transcription_worker(app))
+
 
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
 
 def _get_user_config(context: ContextTypes.DEFAULT_TYPE, base: Config) -> Config:
-    """Merge global config with per-user overrides stored in context.user_data."""
-    from dataclasses import replace
-    ud = context.user_data or {}
+    """
+    Merge global config with per-user overrides stored in context.user_data.
+    The merged Config is cached in user_data (keyed by the override values)
+    so repeat calls within and across updates are plain dict lookups instead
+    of a fresh dataclass construction each time.
+    """
+    ud = context.user_data
+    if ud is None:
+        return base
+
+    key = (ud.get("max_clips"), ud.get("clip_min"), ud.get("clip_max"))
+    if key == (None, None, None):
+        return base
+
+    cached = ud.get("_effective_config")
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
     overrides = {}
-    if "max_clips" in ud:
-        overrides["max_clips_per_video"] = ud["max_clips"]
-    if "clip_min" in ud:
-        overrides["clip_min_duration"] = ud["clip_min"]
-    if "clip_max" in ud:
-        overrides["clip_max_duration"] = ud["clip_max"]
-    return replace(base, **overrides) if overrides else base
+    if key[0] is not None:
+        overrides["max_clips_per_video"] = key[0]
+    if key[1] is not None:
+        overrides["clip_min_duration"] = key[1]
+    if key[2] is not None:
+        overrides["clip_max_duration"] = key[2]
+    merged = replace(base, **overrides)
+    ud["_effective_config"] = (key, merged)
+    return merged
+
+
+def _truncate(s: str, n: int = 40) -> str:
+    """Shorten a string for display, appending an ellipsis when cut."""
+    return s if len(s) <= n else s[:n] + "..."
+
+
+def _transcribe_status(info) -> str:
+    """Status text shown once the download finished and transcription starts."""
+    return (
+        f"🎙️ Transkribiere Audio...\n_{_truncate(info.title)}_\n"
+        f"Dauer: {format_duration(info.duration)} • Plattform: {info.platform}"
+    )
+
+
+# Minimum seconds between edits of the same status message. Edits within
+# the window are coalesced to the latest text.
+_EDIT_MIN_INTERVAL = 1.0
+
+# (chat_id, message_id) -> {"last": monotonic ts, "pending": str|None, "task": Task|None}
+_status_state: dict = {}
 
 
 async def _edit_status(msg, text: str) -> None:
-    """Edit a status message, ignoring errors if the text hasn't changed."""
+    """
+    Schedule a status-message edit without blocking the pipeline.
+
+    Each edit is a 100-300ms network round-trip and counts against the
+    bot-wide rate limit, so edits are fire-and-forget, throttled to one per
+    second per message, and intermediate texts are dropped in favor of the
+    latest one.
+    """
+    key = (msg.chat_id, msg.message_id)
+    state = _status_state.setdefault(key, {"last": 0.0, "pending": None, "task": None})
+    state["pending"] = text
+    if state["task"] is None:
+        delay = max(0.0, _EDIT_MIN_INTERVAL - (time.monotonic() - state["last"]))
+        state["task"] = asyncio.create_task(_flush_status(msg, key, delay))
+
+
+async def _flush_status(msg, key, delay: float) -> None:
+    """Send the latest pending text for a status message after the throttle delay."""
+    if delay > 0:
+        await asyncio.sleep(delay)
+    state = _status_state[key]
+    text = state["pending"]
+    state["pending"] = None
+    state["task"] = None
+    state["last"] = time.monotonic()
     try:
         await msg.edit_text(text)
     except TelegramError:
         pass
+    if state["pending"] is None and state["task"] is None:
+        _status_state.pop(key, None)
+
+
+def _sha256_file(path: Path) -> str:
+    """Stream-hash a file in 1 MB blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+async def _send_clip_files(message, items: list, file_ids: dict = None) -> None:
+    """Upload (path, caption) pairs concurrently, bounded by the rate limit.
+
+    When a file_ids cache is given, clips whose bytes were uploaded before
+    are sent by Telegram file_id — no upload at all. Otherwise the Path is
+    passed so PTB opens and streams the file without blocking the event
+    loop on disk reads.
+    """
+    upload_sem = asyncio.Semaphore(MAX_CONCURRENT_UPLOADS)
+
+    async def send_one(path: Path, caption: str) -> None:
+        async with upload_sem:
+            digest = None
+            if file_ids is not None:
+                digest = await asyncio.to_thread(_sha256_file, path)
+                cached_id = file_ids.get(digest)
+                if cached_id:
+                    await message.reply_video(video=cached_id, caption=caption)
+                    return
+            sent = await message.reply_video(
+                video=path,
+                caption=caption,
+                supports_streaming=True,
+                read_timeout=120,
+                write_timeout=600,
+            )
+            if digest is not None and sent.video is not None:
+                if len(file_ids) >= FILE_ID_CACHE_MAX:
+                    file_ids.pop(next(iter(file_ids)))
+                file_ids[digest] = sent.video.file_id
+
+    results = await asyncio.gather(
+        *(send_one(path, caption) for path, caption in items),
+        return_exceptions=True,
+    )
+    for (path, _), result in zip(items, results):
+        if isinstance(result, TelegramError):
+            logger.error("Failed to send clip %s: %s", path.name, result)
+        elif isinstance(result, BaseException):
+            raise result
 
 
 # ---------------------------------------------------------------------------
@@ -165,18 +439,56 @@ async def cmd_set_max(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
 
 async def handle_url(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Process a video URL: download, transcribe, detect highlights, create clips."""
-    url_match = URL_PATTERN.search(update.message.text)
-    if not url_match:
+    # filters.Regex already ran URL_PATTERN against the message; reuse its
+    # match instead of scanning the text a second time.
+    if not context.matches:
         return
 
-    url = url_match.group(0)
+    url = context.matches[0].group(0)
     config = context.application.bot_data["config"]
-    if "whisper_model" not in context.application.bot_data:
-        context.application.bot_data["whisper_model"] = load_whisper_model(config.whisper_model)
-    whisper_model = context.application.bot_data["whisper_model"]
     effective_config = _get_user_config(context, config)
 
-    status_msg = await update.message.reply_text("⏳ Verarbeite dein Video...")
+    # Cache hit: someone already processed this URL — skip the pipeline
+    # and resend the stored clips.
+    cached = _clip_cache_lookup(config, url)
+    if cached:
+        logger.info("Clip cache hit for %s (%d clips)", url, len(cached))
+        status_msg = await update.message.reply_text(
+            f"⚡ Schon verarbeitet! Schicke {len(cached)} gespeicherte Clip(s)..."
+        )
+        await _send_clip_files(
+            update.message, cached, context.application.bot_data["clip_file_ids"]
+        )
+        return
+
+    # One job per user at a time; the global semaphore bounds memory and CPU
+    # to max_concurrent_jobs × per-job footprint.
+    user_id = update.effective_user.id
+    active_users = context.application.bot_data["active_users"]
+    if user_id in active_users:
+        await update.message.reply_text(
+            "⏳ Du hast bereits ein Video in Bearbeitung. Bitte warte, bis es fertig ist."
+        )
+        return
+
+    # Claim the slot before the first await: two quick messages from the
+    # same user would otherwise both pass the membership check while the
+    # status replies are in flight.
+    active_users.add(user_id)
+    try:
+        status_msg = await update.message.reply_text("⏳ Verarbeite dein Video...")
+        job_sem = context.application.bot_data["job_sem"]
+        if job_sem.locked():
+            await _edit_status(status_msg, "🕐 Gerade viel los – dein Video ist in der Warteschlange...")
+
+        async with job_sem:
+            await _run_pipeline(update, context, url, config, effective_config, status_msg)
+    finally:
+        active_users.discard(user_id)
+
+
+async def _run_pipeline(update, context, url, config, effective_config, status_msg) -> None:
+    """Run the download → transcribe → highlight → clip → upload pipeline."""
     t_start = time.monotonic()
 
     try:
@@ -187,44 +499,46 @@ async def handle_url(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None
             video_info = await asyncio.to_thread(
                 download_video, url, job_dir, effective_config.max_video_duration, effective_config.cookies_file
             )
-            title_short = video_info.title[:40] + "..." if len(video_info.title) > 40 else video_info.title
-            await _edit_status(
-                status_msg,
-                f"🎙️ Transkribiere Audio...\n_{title_short}_\n"
-                f"Dauer: {format_duration(video_info.duration)} • Plattform: {video_info.platform}",
+            await _edit_status(status_msg, _transcribe_status(video_info))
+
+            # 2. Transcribe (batched with any other pending jobs), overlapping
+            # the audio-energy and scene-change passes that highlight
+            # detection will need anyway.
+            transcript, energy, scene_changes = await asyncio.gather(
+                _request_transcription(context, video_info.audio),
+                asyncio.to_thread(compute_audio_energy, video_info.audio),
+                asyncio.to_thread(detect_scene_changes, video_info.video_path),
             )
 
-            # 2. Transcribe
-            transcript = await asyncio.to_thread(
-                transcribe_audio,
-                video_info.audio_path,
-                whisper_model,
-                effective_config.whisper_beam_size,
-            )
+            cpu_sem = context.application.bot_data["cpu_sem"]
 
             # 3. Detect highlights
             await _edit_status(status_msg, "🔍 Erkenne beste Momente...")
-            candidates = await asyncio.to_thread(
-                find_highlights,
-                video_info.audio_path,
-                video_info.video_path,
-                transcript.words,
-                video_info.chapters,
-                effective_config,
-            )
+            async with cpu_sem:
+                candidates = await asyncio.to_thread(
+                    find_highlights,
+                    video_info.audio,
+                    video_info.video_path,
+                    transcript.words,
+                    video_info.chapters,
+                    effective_config,
+                    energy,
+                    scene_changes,
+                )
 
             # 4. Create clips
             n = len(candidates)
             await _edit_status(status_msg, f"✂️ Erstelle {n} Clip{'s' if n != 1 else ''}...")
             output_dir = effective_config.output_dir / job_dir.name
-            clips = await asyncio.to_thread(
-                process_all_clips,
-                video_info.video_path,
-                candidates,
-                transcript.words,
-                output_dir,
-                effective_config,
-            )
+            async with cpu_sem:
+                clips = await asyncio.to_thread(
+                    process_all_clips,
+                    video_info.video_path,
+                    candidates,
+                    transcript.words,
+                    output_dir,
+                    effective_config,
+                )
 
             # 5. Send clips
             if not clips:
@@ -237,20 +551,24 @@ async def handle_url(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None
                 f"✅ Fertig in {format_duration(elapsed)}! Schicke {len(clips)} Clip(s)...",
             )
 
-            for clip in clips:
-                candidate = candidates[clip.clip_index - 1]
-                caption = (
-                    f"🎬 Clip {clip.clip_index}/{len(clips)} "
-                    f"| {format_duration(clip.duration)} "
-                    f"| 📍 {format_duration(clip.start_time)}"
-                    f"\n💡 {candidate.reason}"
+            captions = [
+                CAPTION_TMPL.format(
+                    i=clip.clip_index,
+                    n=len(clips),
+                    dur=format_duration(clip.duration),
+                    start=format_duration(clip.start_time),
+                    reason=candidates[clip.clip_index - 1].reason,
                 )
-                with open(clip.path, "rb") as f:
-                    await update.message.reply_video(
-                        video=f,
-                        caption=caption,
-                        supports_streaming=True,
-                    )
+                for clip in clips
+            ]
+            await _send_clip_files(
+                update.message,
+                [(c.path, cap) for c, cap in zip(clips, captions)],
+                context.application.bot_data["clip_file_ids"],
+            )
+
+            # Keep the rendered clips for future submissions of the same URL
+            await asyncio.to_thread(_clip_cache_store, config, url, clips, captions)
 
     except DownloadError as e:
         logger.warning("Download error for %s: %s", url, e)
@@ -290,14 +608,37 @@ def main() -> None:
     config = load_config()
     setup_logging(config.log_level)
 
+    # uvloop's libuv event loop makes the bot's socket I/O (polling, status
+    # edits, concurrent uploads) noticeably faster; optional, Unix-only.
+    try:
+        import uvloop
+        uvloop.install()
+        logger.debug("uvloop installed as the asyncio event loop policy.")
+    except ImportError:
+        pass
+
     # Ensure directories exist
     config.output_dir.mkdir(parents=True, exist_ok=True)
     config.temp_dir.mkdir(parents=True, exist_ok=True)
 
-    app = Application.builder().token(config.telegram_bot_token).build()
+    # Trim the rendered-clip cache before serving
+    _clip_cache_evict(config)
+
+    app = Application.builder().token(config.telegram_bot_token).post_init(_post_init).build()
 
-    # Store shared state (whisper model loaded lazily on first use)
+    # Store shared state. Load the Whisper model eagerly so the first request
+    # doesn't block for seconds (and two concurrent requests can't race the load).
     app.bot_data["config"] = config
+    app.bot_data["whisper_model"] = load_whisper_model(
+        config.whisper_model,
+        # Lives next to the clip cache on persistent storage — temp_dir can
+        # be RAM-backed (/dev/shm) and is wiped on reboot, which would force
+        # a cold model download/convert every restart and pin the converted
+        # weights in tmpfs on top of the loaded model.
+        download_root=config.output_dir / "whisper_cache",
+        device=config.whisper_device,
+        compute_type=config.whisper_compute_type,
+    )
 
     # Register handlers
     app.add_handler(CommandHandler("start", cmd_start))
@@ -1,6 +1,7 @@
 from dataclasses import dataclass, field
 from pathlib import Path
 import os
+import shutil
 from dotenv import load_dotenv
 
 
@@ -15,20 +16,42 @@ class Config:
     temp_dir: Path = Path("./tmp")
     max_video_duration: int = 3600
     max_file_size_mb: int = 500
-    whisper_beam_size: int = 5
+    max_concurrent_jobs: int = 2
+    whisper_beam_size: int = 1
+    whisper_device: str = "auto"
+    whisper_compute_type: str = "auto"
+    parallel_clips: bool = True
     audio_energy_weight: float = 0.4
     keyword_weight: float = 0.3
     scene_change_weight: float = 0.3
     log_level: str = "INFO"
     cookies_file: Path = Path("/home/user/TikTok_Videos/cookies.txt")
-    tiktok_keywords: list = field(default_factory=lambda: [
+    # frozenset: O(1) membership tests in the keyword scorer, and hashable
+    # so it can key caches (e.g. the Aho-Corasick automaton cache).
+    tiktok_keywords: frozenset = field(default_factory=lambda: frozenset({
         "wait", "listen", "actually", "insane", "crazy", "no way",
         "what", "omg", "wow", "legendary", "fail", "win", "sick",
         "bro", "literally", "shocking", "unbelievable", "secret",
-        "wait for it", "you won't believe", "insane", "fire", "goat",
+        "wait for it", "you won't believe", "fire", "goat",
         "clutch", "let's go", "no", "yes", "really", "seriously",
         "warte", "krass", "unfassbar", "unmöglich", "ehrlich",
-    ])
+    }))
+
+
+def _default_temp_dir() -> Path:
+    """
+    Pick the temp root when TEMP_DIR isn't set explicitly.
+    Prefers RAM-backed /dev/shm (with at least 2 GB free) so downloads and
+    ffmpeg intermediates never hit the disk; falls back to ./tmp.
+    """
+    shm = Path("/dev/shm")
+    if shm.is_dir():
+        try:
+            if shutil.disk_usage(shm).free >= 2 * 1024 ** 3:
+                return shm / "tiktok_bot"
+        except OSError:
+            pass
+    return Path("./tmp")
 
 
 def load_config() -> Config:
@@ -48,10 +71,14 @@ def load_config() -> Config:
         clip_min_duration=int(os.getenv("CLIP_MIN_DURATION", 15)),
         clip_max_duration=int(os.getenv("CLIP_MAX_DURATION", 60)),
         output_dir=Path(os.getenv("OUTPUT_DIR", "./output")),
-        temp_dir=Path(os.getenv("TEMP_DIR", "./tmp")),
+        temp_dir=Path(os.getenv("TEMP_DIR")) if os.getenv("TEMP_DIR") else _default_temp_dir(),
         max_video_duration=int(os.getenv("MAX_VIDEO_DURATION", 3600)),
         max_file_size_mb=int(os.getenv("MAX_FILE_SIZE_MB", 500)),
-        whisper_beam_size=int(os.getenv("WHISPER_BEAM_SIZE", 5)),
+        max_concurrent_jobs=int(os.getenv("MAX_CONCURRENT_JOBS", 2)),
+        whisper_beam_size=int(os.getenv("WHISPER_BEAM_SIZE", 1)),
+        whisper_device=os.getenv("WHISPER_DEVICE", "auto"),
+        whisper_compute_type=os.getenv("WHISPER_COMPUTE_TYPE", "auto"),
+        parallel_clips=os.getenv("PARALLEL_CLIPS", "true").lower() in ("1", "true", "yes"),
         audio_energy_weight=float(os.getenv("AUDIO_ENERGY_WEIGHT", 0.4)),
         keyword_weight=float(os.getenv("KEYWORD_WEIGHT", 0.3)),
         scene_change_weight=float(os.getenv("SCENE_CHANGE_WEIGHT", 0.3)),
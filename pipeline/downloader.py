@@ -1,7 +1,11 @@
 import logging
+import re
+import subprocess
+import threading
 from pathlib import Path
 from dataclasses import dataclass, field
 
+import numpy as np
 import yt_dlp
 
 logger = logging.getLogger(__name__)
@@ -14,9 +18,17 @@ class VideoInfo:
     url: str
     platform: str
     video_path: Path
-    audio_path: Path
+    audio_path: Path = None
+    # Decoded 16 kHz mono float32 samples; preferred over audio_path because
+    # Whisper and the energy pass consume it without another decode.
+    audio_array: np.ndarray = None
     chapters: list = field(default_factory=list)
 
+    @property
+    def audio(self):
+        """Whatever audio representation is available (array preferred)."""
+        return self.audio_array if self.audio_array is not None else self.audio_path
+
 
 class DownloadError(Exception):
     """Raised when a download fails or the video exceeds limits."""
@@ -25,25 +37,36 @@ class DownloadError(Exception):
         super().__init__(message)
 
 
+# One compiled alternation instead of a Python loop of substring checks.
+# Group names can't contain "/" or ".", so they map to display names below.
+_PLATFORM_RE = re.compile(
+    r"(?P<youtube>youtube\.com|youtu\.be)"
+    r"|(?P<twitch>twitch\.tv)"
+    r"|(?P<kick>kick\.com)"
+    r"|(?P<tiktok>tiktok\.com)"
+    r"|(?P<instagram>instagram\.com)"
+    r"|(?P<twitter>twitter\.com|\bx\.com)"
+    r"|(?P<reddit>reddit\.com)"
+    r"|(?P<facebook>facebook\.com)",
+    re.IGNORECASE,
+)
+
+_PLATFORM_NAMES = {
+    "youtube": "YouTube",
+    "twitch": "Twitch",
+    "kick": "Kick",
+    "tiktok": "TikTok",
+    "instagram": "Instagram",
+    "twitter": "Twitter/X",
+    "reddit": "Reddit",
+    "facebook": "Facebook",
+}
+
+
 def get_platform(url: str) -> str:
     """Detect platform name from URL."""
-    url_lower = url.lower()
-    platforms = {
-        "youtube.com": "YouTube",
-        "youtu.be": "YouTube",
-        "twitch.tv": "Twitch",
-        "kick.com": "Kick",
-        "tiktok.com": "TikTok",
-        "instagram.com": "Instagram",
-        "twitter.com": "Twitter/X",
-        "x.com": "Twitter/X",
-        "reddit.com": "Reddit",
-        "facebook.com": "Facebook",
-    }
-    for domain, name in platforms.items():
-        if domain in url_lower:
-            return name
-    return "Unknown"
+    m = _PLATFORM_RE.search(url)
+    return _PLATFORM_NAMES[m.lastgroup] if m else "Unknown"
 
 
 def extract_chapters(info: dict) -> list:
@@ -86,18 +109,30 @@ def _base_ydl_opts(cookies_file=None) -> dict:
     return opts
 
 
+# Probe options never vary per job, so one YoutubeDL instance (extractor
+# registry, cookie jar, opener setup) is built per cookies file and reused.
+# yt-dlp instances are not reentrant, hence the lock.
+_PROBE_YDL_CACHE: dict = {}
+_YDL_LOCK = threading.Lock()
+
+
+def _get_probe_ydl(cookies_file=None) -> yt_dlp.YoutubeDL:
+    key = str(cookies_file) if cookies_file else None
+    ydl = _PROBE_YDL_CACHE.get(key)
+    if ydl is None:
+        ydl = yt_dlp.YoutubeDL({**_base_ydl_opts(cookies_file), "skip_download": True})
+        _PROBE_YDL_CACHE[key] = ydl
+    return ydl
+
+
 def probe_video(url: str, max_duration: int, cookies_file=None) -> dict:
     """
     Probe URL metadata without downloading. Returns yt-dlp info dict.
     Raises DownloadError if URL is unsupported or duration exceeds limit.
     """
-    ydl_opts = {
-        **_base_ydl_opts(cookies_file),
-        "skip_download": True,
-    }
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+    with _YDL_LOCK:
         try:
-            info = ydl.extract_info(url, download=False)
+            info = _get_probe_ydl(cookies_file).extract_info(url, download=False)
         except yt_dlp.utils.DownloadError as e:
             raise DownloadError(
                 f"yt-dlp error: {e}",
@@ -121,57 +156,68 @@ def download_video(url: str, output_dir: Path, max_duration: int, cookies_file=N
     """
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    # Probe first to check duration and get metadata
-    info = probe_video(url, max_duration, cookies_file)
-    title = info.get("title", "video")
-    platform = get_platform(url)
-    chapters = extract_chapters(info)
-
-    logger.info("Downloading '%s' from %s (%.0fs)", title, platform, info.get("duration", 0))
-
     video_tmpl = str(output_dir / "video.%(ext)s")
-    audio_tmpl = str(output_dir / "audio.%(ext)s")
 
-    # Download video (max 720p is sufficient since we output 1080x1920 portrait)
+    def _reject_too_long(info_dict):
+        """yt-dlp match_filter: skip the download if the video exceeds the limit."""
+        duration = info_dict.get("duration") or 0
+        if duration > max_duration:
+            return f"Video too long: {duration}s > {max_duration}s"
+        return None
+
+    # One extract_info(download=True) call does metadata + download in a
+    # single extractor run; the match_filter enforces the duration cap
+    # before any bytes are fetched. (Previously a separate probe ran the
+    # extractor twice per URL.)
+    # Max 720p is sufficient since we output 1080x1920 portrait.
     video_opts = {
         **_base_ydl_opts(cookies_file),
         "format": "bestvideo[height<=720]+bestaudio/best[height<=720]/best",
         "outtmpl": video_tmpl,
         "merge_output_format": "mp4",
+        "match_filter": _reject_too_long,
     }
     with yt_dlp.YoutubeDL(video_opts) as ydl:
         try:
-            ydl.download([url])
+            info = ydl.extract_info(url, download=True)
         except yt_dlp.utils.DownloadError as e:
-            raise DownloadError(f"Download failed: {e}", user_message="Download failed. Please try again.")
+            raise DownloadError(
+                f"Download failed: {e}",
+                user_message="Could not access this video. It may be private, age-restricted, or from an unsupported platform.",
+            )
 
-    # Extract audio separately for Whisper (much smaller file)
-    audio_opts = {
-        **_base_ydl_opts(cookies_file),
-        "format": "bestaudio/best",
-        "outtmpl": audio_tmpl,
-        "postprocessors": [{
-            "key": "FFmpegExtractAudio",
-            "preferredcodec": "mp3",
-            "preferredquality": "128",
-        }],
-    }
-    with yt_dlp.YoutubeDL(audio_opts) as ydl:
-        try:
-            ydl.download([url])
-        except yt_dlp.utils.DownloadError as e:
-            raise DownloadError(f"Audio extraction failed: {e}", user_message="Could not extract audio.")
+    duration = info.get("duration") or 0
+    if duration > max_duration:
+        raise DownloadError(
+            f"Video too long: {duration}s > {max_duration}s",
+            user_message=f"Video is too long ({duration // 60} min). Maximum is {max_duration // 60} minutes.",
+        )
 
-    # Find the actual downloaded files
-    video_path = _find_file(output_dir, "video")
-    audio_path = _find_file(output_dir, "audio")
+    title = info.get("title", "video")
+    platform = get_platform(url)
+    chapters = extract_chapters(info)
+    logger.info("Downloaded '%s' from %s (%.0fs)", title, platform, duration)
 
+    # Find the actual downloaded file
+    video_path = _find_file(output_dir, "video")
     if not video_path or not video_path.exists():
         raise DownloadError("Video file not found after download.", user_message="Download seems to have failed.")
-    if not audio_path or not audio_path.exists():
-        raise DownloadError("Audio file not found after extraction.", user_message="Audio extraction failed.")
 
-    logger.info("Downloaded: video=%s audio=%s", video_path.name, audio_path.name)
+    # Extract audio locally from the downloaded video (avoids a second
+    # network download of the same stream). Preferred form is a decoded
+    # 16 kHz mono array handed straight to Whisper — no intermediate file,
+    # no re-decode; a wav file is the last-resort fallback.
+    audio_array = _extract_audio_pyav(video_path)
+    if audio_array is None:
+        audio_array = _extract_audio_array(video_path)
+    audio_path = None
+    if audio_array is None:
+        audio_path = _extract_audio(video_path, output_dir)
+
+    logger.info(
+        "Extracted audio: %s",
+        "in-memory array" if audio_array is not None else audio_path.name,
+    )
 
     return VideoInfo(
         title=title,
@@ -180,10 +226,106 @@ def download_video(url: str, output_dir: Path, max_duration: int, cookies_file=N
         platform=platform,
         video_path=video_path,
         audio_path=audio_path,
+        audio_array=audio_array,
         chapters=chapters,
     )
 
 
+def _extract_audio_pyav(video_path: Path) -> np.ndarray | None:
+    """
+    Decode audio to a 16 kHz mono float32 array via PyAV inside the bot
+    process. libav is loaded once per process, so repeated jobs skip the
+    ffmpeg fork+exec and shared-library init entirely. Returns None if PyAV
+    is unavailable or decoding fails (caller falls back to ffmpeg).
+    """
+    try:
+        import av
+    except ImportError:
+        return None
+    try:
+        resampler = av.AudioResampler(format="s16", layout="mono", rate=16000)
+        chunks = []
+        with av.open(str(video_path)) as container:
+            in_stream = container.streams.audio[0]
+            for frame in container.decode(in_stream):
+                for resampled in resampler.resample(frame):
+                    chunks.append(resampled.to_ndarray().reshape(-1))
+        if not chunks:
+            return None
+        return np.concatenate(chunks).astype(np.float32) / 32768.0
+    except Exception as e:
+        logger.warning("PyAV audio extraction failed, falling back to ffmpeg: %s", e)
+        return None
+
+
+def _extract_audio_array(video_path: Path) -> np.ndarray | None:
+    """
+    Decode audio to a 16 kHz mono float32 array by piping raw PCM out of
+    ffmpeg — no intermediate file, and Whisper consumes the array directly.
+    Returns None on failure (caller falls back to a wav file on disk).
+    """
+    cmd = [
+        "ffmpeg",
+        "-hide_banner", "-loglevel", "error",
+        "-threads", "0",
+        "-i", str(video_path),
+        "-vn",
+        "-ac", "1",
+        "-ar", "16000",
+        "-f", "s16le",
+        "-",
+    ]
+    try:
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=600)
+    except (subprocess.TimeoutExpired, FileNotFoundError) as e:
+        logger.warning("ffmpeg PCM extraction failed: %s", e)
+        return None
+    if result.returncode != 0 or len(result.stdout) < 2000:
+        logger.warning("ffmpeg PCM extraction failed: %s", result.stderr[-500:])
+        return None
+    return np.frombuffer(result.stdout, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def _extract_audio(video_path: Path, output_dir: Path) -> Path:
+    """
+    Extract the audio track from an already-downloaded video in one ffmpeg
+    pass. Duration and metadata are already known from the probe, so this
+    is the only extra container parse per job.
+
+    Output is 16 kHz mono PCM — exactly what Whisper resamples to
+    internally — so we skip the mp3 encode here and the mp3 decode on the
+    Whisper side entirely.
+    """
+    audio_path = output_dir / "audio.wav"
+    cmd = [
+        "ffmpeg", "-y",
+        "-hide_banner", "-loglevel", "error",
+        "-threads", "0",          # let libav use all cores
+        "-i", str(video_path),
+        "-vn",
+        "-ac", "1",
+        "-ar", "16000",
+        "-c:a", "pcm_s16le",
+        str(audio_path),
+    ]
+    try:
+        # Only stderr matters here; routing stdout to /dev/null avoids
+        # buffering output nobody reads.
+        result = subprocess.run(
+            cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=600
+        )
+    except (subprocess.TimeoutExpired, FileNotFoundError) as e:
+        raise DownloadError(f"Audio extraction failed: {e}", user_message="Could not extract audio.")
+
+    if result.returncode != 0 or not audio_path.exists():
+        logger.error("ffmpeg stderr: %s", result.stderr[-2000:])
+        raise DownloadError(
+            f"ffmpeg audio extraction failed with code {result.returncode}",
+            user_message="Could not extract audio.",
+        )
+    return audio_path
+
+
 def _find_file(directory: Path, stem: str) -> Path | None:
     """Find a file in directory matching the given stem (any extension)."""
     for f in directory.iterdir():
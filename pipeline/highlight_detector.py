@@ -1,7 +1,9 @@
 import logging
 import subprocess
 import re
+import threading
 from dataclasses import dataclass
+from pathlib import Path
 
 import numpy as np
 
@@ -22,75 +24,221 @@ class NoHighlightsError(Exception):
         super().__init__(message)
 
 
-def detect_scene_changes(video_path, threshold: float = 0.4) -> list:
+# showinfo writes one "pts_time:…" line per selected frame to stderr
+_PTS_TIME_RE = re.compile(rb"pts_time:([\d.]+)")
+
+
+def detect_scene_changes(video_path, threshold: float = 0.4, min_gap_s: float = 1.0) -> list:
     """
-    Use FFmpeg scene detection filter to find scene change timestamps.
-    Samples at 1fps to keep it fast even for long videos.
+    Find scene change timestamps with FFmpeg, sampling at 1fps to keep it
+    fast even for long videos. Prefers the purpose-built scdet filter with
+    machine-parseable metadata output; falls back to the select/showinfo
+    stderr scrape on ffmpeg builds without scdet. Cuts closer together than
+    min_gap_s are collapsed so downstream scoring sees stable counts.
     Returns list of timestamps in seconds.
     """
+    timestamps = _detect_scenes_scdet(video_path, threshold)
+    if timestamps is None:
+        timestamps = _detect_scenes_showinfo(video_path, threshold)
+
+    deduped = []
+    for t in timestamps:
+        if not deduped or t - deduped[-1] >= min_gap_s:
+            deduped.append(t)
+    logger.info("Found %d scene changes", len(deduped))
+    return deduped
+
+
+def _detect_scenes_scdet(video_path, threshold: float) -> list | None:
+    """
+    Run the scdet filter and print its per-frame metadata to a file, then
+    pull pts_time for frames tagged with lavfi.scd.time (the detected cuts).
+    No stderr scraping, no showinfo noise. Returns None if the filter is
+    unavailable or the run fails (caller falls back to showinfo).
+    """
+    import tempfile
+
+    with tempfile.TemporaryDirectory(prefix="scdet_") as tmp:
+        meta_path = Path(tmp) / "scenes.txt"
+        # scdet's threshold is 0-100 where select's scene score is 0-1
+        cmd = [
+            "ffmpeg", "-i", str(video_path),
+            "-r", "1",
+            "-vf", f"scdet=threshold={threshold * 100:g},metadata=mode=print:file={meta_path}",
+            "-an",
+            "-f", "null", "-",
+        ]
+        try:
+            result = subprocess.run(
+                cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=300
+            )
+        except (subprocess.TimeoutExpired, FileNotFoundError) as e:
+            logger.warning("scdet scene detection failed: %s", e)
+            return None
+        if result.returncode != 0 or not meta_path.exists():
+            logger.warning("scdet unavailable (exit %s), falling back to showinfo", result.returncode)
+            return None
+
+        # File alternates frame headers ("frame:N pts:… pts_time:T") with
+        # key=value metadata lines; a lavfi.scd.time key marks a cut frame.
+        timestamps = []
+        last_pts_time = None
+        with open(meta_path, "rb") as f:
+            for line in f:
+                if line.startswith(b"frame:"):
+                    m = _PTS_TIME_RE.search(line)
+                    last_pts_time = float(m.group(1)) if m else None
+                elif line.startswith(b"lavfi.scd.time=") and last_pts_time is not None:
+                    timestamps.append(last_pts_time)
+        return timestamps
+
+
+def _detect_scenes_showinfo(video_path, threshold: float) -> list:
+    """
+    Legacy scene detection: select frames over the scene-score threshold and
+    scrape their pts_time from showinfo's stderr, streamed line by line (a
+    long video can emit megabytes of output; buffering it whole and
+    splitting costs memory for nothing).
+    """
     cmd = [
         "ffmpeg", "-i", str(video_path),
         "-r", "1",
         "-vf", f"select='gt(scene,{threshold})',showinfo",
         "-f", "null", "-",
     ]
+    timestamps = []
     try:
-        result = subprocess.run(
+        proc = subprocess.Popen(
             cmd,
-            capture_output=True,
-            text=True,
-            timeout=300,
+            stdout=subprocess.DEVNULL,  # -f null writes nothing useful to stdout
+            stderr=subprocess.PIPE,
         )
-        # Parse pts_time from stderr (showinfo outputs there)
-        timestamps = []
-        for line in result.stderr.splitlines():
-            m = re.search(r"pts_time:([\d.]+)", line)
+    except FileNotFoundError as e:
+        logger.warning("Scene detection failed: %s", e)
+        return []
+
+    # Popen has no timeout kwarg while we stream; kill from a timer instead.
+    timed_out = threading.Event()
+
+    def _kill():
+        timed_out.set()
+        proc.kill()
+
+    timer = threading.Timer(300, _kill)
+    timer.start()
+    try:
+        for line in proc.stderr:
+            m = _PTS_TIME_RE.search(line)
             if m:
                 timestamps.append(float(m.group(1)))
-        logger.info("Found %d scene changes", len(timestamps))
-        return timestamps
-    except (subprocess.TimeoutExpired, FileNotFoundError) as e:
-        logger.warning("Scene detection failed: %s", e)
+        proc.wait()
+    finally:
+        timer.cancel()
+
+    if timed_out.is_set():
+        logger.warning("Scene detection timed out")
         return []
 
+    return timestamps
+
+
+def _decode_pcm_ffmpeg(audio_path) -> np.ndarray | None:
+    """
+    Decode a file to 16 kHz mono float32 by piping raw s16le PCM out of
+    ffmpeg. One copy out of the pipe, no Python-level sample iteration, and
+    downsampling before the RMS pass cuts the bytes moved ~3x for typical
+    48 kHz sources. Returns None on failure (caller falls back to pydub).
+    """
+    cmd = [
+        "ffmpeg",
+        "-hide_banner", "-loglevel", "error",
+        "-i", str(audio_path),
+        "-f", "s16le",
+        "-acodec", "pcm_s16le",
+        "-ac", "1",
+        "-ar", "16000",
+        "-",
+    ]
+    try:
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=300)
+    except (subprocess.TimeoutExpired, FileNotFoundError) as e:
+        logger.warning("ffmpeg PCM decode failed: %s", e)
+        return None
+    if result.returncode != 0 or not result.stdout:
+        logger.warning("ffmpeg PCM decode failed: %s", result.stderr[-500:])
+        return None
+    return np.frombuffer(result.stdout, dtype=np.int16).astype(np.float32) / 32768.0
+
 
-def compute_audio_energy(audio_path, window_ms: int = 500, hop_ms: int = 100):
+def compute_audio_energy(audio, window_ms: int = 500, hop_ms: int = 100):
     """
-    Compute RMS energy curve from audio file.
+    Compute RMS energy curve from an audio source: either a file path
+    (decoded via an ffmpeg PCM pipe, pydub as fallback) or an already-decoded
+    mono float32 array sampled at 16 kHz as produced by the downloader (no
+    decode needed at all).
     Returns (times_seconds, rms_values) as numpy arrays.
     """
     try:
-        from pydub import AudioSegment
-        audio = AudioSegment.from_file(str(audio_path))
-        audio = audio.set_channels(1)  # mono
-        samples = np.array(audio.get_array_of_samples(), dtype=np.float32)
-        # Normalize to [-1, 1]
-        max_val = float(2 ** (audio.sample_width * 8 - 1))
-        samples = samples / max_val
-
-        sr = audio.frame_rate
+        if isinstance(audio, np.ndarray):
+            samples = audio
+            sr = 16000
+        elif (samples := _decode_pcm_ffmpeg(audio)) is not None:
+            sr = 16000
+        else:
+            from pydub import AudioSegment
+            segment = AudioSegment.from_file(str(audio))
+            segment = segment.set_channels(1)  # mono
+            samples = np.array(segment.get_array_of_samples(), dtype=np.float32)
+            # Normalize to [-1, 1] in place (no extra temporary)
+            max_val = float(2 ** (segment.sample_width * 8 - 1))
+            samples /= max_val
+            sr = segment.frame_rate
+
         window = int(sr * window_ms / 1000)
         hop = int(sr * hop_ms / 1000)
+        if len(samples) <= window:
+            return np.array([]), np.array([])
 
-        times = []
-        rms_values = []
-        for i in range(0, len(samples) - window, hop):
-            chunk = samples[i:i + window]
-            rms = float(np.sqrt(np.mean(chunk ** 2)))
-            times.append(i / sr)
-            rms_values.append(rms)
+        # One batched reduce over a strided view instead of a Python loop
+        # per hop: sliding_window_view is zero-copy, and einsum reduces each
+        # window to its sum of squares without materializing the squared
+        # frames (an hour of 16 kHz audio would be a ~1 GB temporary), so
+        # the only allocation is the n_windows-sized output.
+        frames = np.lib.stride_tricks.sliding_window_view(samples, window)[::hop]
+        rms_values = np.sqrt(np.einsum("ij,ij->i", frames, frames) / window)
+        times = np.arange(len(rms_values), dtype=np.float32) * (hop / sr)
 
-        return np.array(times), np.array(rms_values)
+        return times, rms_values
 
     except Exception as e:
         logger.warning("Audio energy computation failed: %s", e)
         return np.array([]), np.array([])
 
 
+def _peaks_kernel(times, rms, threshold, min_gap):
+    """Gap-enforcing threshold walk; numba-compiled below when available."""
+    out = np.empty(len(rms), dtype=np.float64)
+    n = 0
+    for i in range(len(rms)):
+        if rms[i] > threshold and (n == 0 or times[i] - out[n - 1] >= min_gap):
+            out[n] = times[i]
+            n += 1
+    return out[:n]
+
+
+try:
+    from numba import njit
+    _peaks_kernel = njit(cache=True)(_peaks_kernel)
+except ImportError:
+    pass  # plain-Python kernel; numba is an optional speedup
+
+
 def find_energy_peaks(times: np.ndarray, rms: np.ndarray, min_gap_s: float = 20.0) -> list:
     """
     Find timestamps where audio energy significantly exceeds the median.
-    Enforces a minimum gap between returned peaks.
+    Enforces a minimum gap between returned peaks. The sequential walk
+    (each acceptance depends on the previous one) can't be vectorized, so
+    it runs as a numba kernel where that's installed.
     """
     if len(rms) == 0:
         return []
@@ -99,19 +247,72 @@ def find_energy_peaks(times: np.ndarray, rms: np.ndarray, min_gap_s: float = 20.
     if median_rms == 0:
         return []
 
-    threshold = median_rms * 1.8
-    peak_times = []
-
-    for i, (t, r) in enumerate(zip(times, rms)):
-        if r > threshold:
-            if not peak_times or (t - peak_times[-1]) >= min_gap_s:
-                peak_times.append(float(t))
+    peaks = _peaks_kernel(
+        np.ascontiguousarray(times, dtype=np.float64),
+        np.ascontiguousarray(rms, dtype=np.float64),
+        median_rms * 1.8,
+        min_gap_s,
+    )
+    peak_times = [float(t) for t in peaks]
 
     logger.info("Found %d audio energy peaks", len(peak_times))
     return peak_times
 
 
-def score_transcript_keywords(words: list, keywords: list) -> list:
+_PUNCT = ".,!?;:\"'"
+
+# Aho-Corasick automatons are built once per keyword set; the scan is then
+# linear in transcript length regardless of how many keywords there are.
+_AUTOMATON_CACHE: dict = {}
+
+
+def _get_keyword_automaton(keywords):
+    """Return a cached Aho-Corasick automaton, or None if pyahocorasick is unavailable."""
+    try:
+        import ahocorasick
+    except ImportError:
+        return None
+
+    key = tuple(sorted(keywords))
+    automaton = _AUTOMATON_CACHE.get(key)
+    if automaton is None:
+        automaton = ahocorasick.Automaton()
+        for kw in key:
+            kw = kw.lower().strip()
+            automaton.add_word(kw, kw)
+        automaton.make_automaton()
+        _AUTOMATON_CACHE[key] = automaton
+    return automaton
+
+
+def _keyword_hit_indices(cleaned: list, automaton) -> list:
+    """
+    Scan the joined transcript once with the automaton and map matches back
+    to word indices. Unlike per-token matching, this also catches multi-word
+    keywords like "wait for it" and "no way".
+    """
+    from bisect import bisect_right
+
+    starts = []
+    pos = 0
+    for token in cleaned:
+        starts.append(pos)
+        pos += len(token) + 1
+    joined = " ".join(cleaned)
+
+    indices = set()
+    for end_pos, kw in automaton.iter(joined):
+        start_pos = end_pos - len(kw) + 1
+        # Only accept matches aligned to word boundaries
+        if start_pos > 0 and joined[start_pos - 1] != " ":
+            continue
+        if end_pos + 1 < len(joined) and joined[end_pos + 1] != " ":
+            continue
+        indices.add(bisect_right(starts, start_pos) - 1)
+    return sorted(indices)
+
+
+def score_transcript_keywords(words: list, keywords: frozenset) -> list:
     """
     Find timestamp windows where TikTok keywords appear.
     Returns list of (start, end, density_score) tuples.
@@ -119,36 +320,58 @@ def score_transcript_keywords(words: list, keywords: list) -> list:
     if not words:
         return []
 
-    keyword_set = {k.lower().strip() for k in keywords}
-    hits = []
+    cleaned = [w.word.lower().strip(_PUNCT) for w in words]
+    automaton = _get_keyword_automaton(keywords)
 
-    for i, word in enumerate(words):
-        if word.word.lower().strip(".,!?;:\"'") in keyword_set:
+    if automaton is not None:
+        from bisect import bisect_left
+        hit_indices = _keyword_hit_indices(cleaned, automaton)
+        hits = []
+        for i in hit_indices:
             # Expand to a window of ~10 words around the keyword
             ctx_start = max(0, i - 5)
             ctx_end = min(len(words) - 1, i + 10)
             window_words = words[ctx_start:ctx_end]
             if window_words:
-                kw_count = sum(
-                    1 for w in window_words
-                    if w.word.lower().strip(".,!?;:\"'") in keyword_set
-                )
+                kw_count = bisect_left(hit_indices, ctx_end) - bisect_left(hit_indices, ctx_start)
                 density = kw_count / len(window_words)
                 hits.append((window_words[0].start, window_words[-1].end, density))
+        return hits
+
+    # Fallback: per-token membership scan (single-word keywords only).
+    # One boolean mask over the cleaned tokens serves both the hit indices
+    # and the per-window density counts — no re-testing membership per hit.
+    keyword_set = {k.lower().strip() for k in keywords}
+    hits_mask = np.fromiter((c in keyword_set for c in cleaned), dtype=np.bool_, count=len(cleaned))
+    hits = []
+    for i in np.flatnonzero(hits_mask):
+        # Expand to a window of ~10 words around the keyword
+        ctx_start = max(0, i - 5)
+        ctx_end = min(len(words) - 1, i + 10)
+        window_words = words[ctx_start:ctx_end]
+        if window_words:
+            density = int(hits_mask[ctx_start:ctx_end].sum()) / len(window_words)
+            hits.append((window_words[0].start, window_words[-1].end, density))
 
     return hits
 
 
 def find_highlights(
-    audio_path,
+    audio,
     video_path,
     words: list,
     chapters: list,
     config,
+    energy: tuple = None,
+    scene_changes: list = None,
 ) -> list:
     """
     Main highlight detection entry point.
     Returns a list of ClipCandidate sorted by score descending.
+
+    `energy` (times, rms arrays) and `scene_changes` may be precomputed by
+    the caller — e.g. in parallel with transcription — to overlap the two
+    long-running stages; otherwise they are computed here.
     """
     min_dur = config.clip_min_duration
     max_dur = config.clip_max_duration
@@ -170,10 +393,11 @@ def find_highlights(
             logger.info("Using %d chapter-based clips", len(chapter_clips))
             return chapter_clips[:max_clips]
 
-    # Gather signals
-    times, rms = compute_audio_energy(audio_path)
+    # Gather signals (unless the caller already computed them concurrently)
+    times, rms = energy if energy is not None else compute_audio_energy(audio)
     energy_peaks = find_energy_peaks(times, rms, min_gap_s=max_dur * 0.5)
-    scene_changes = detect_scene_changes(video_path)
+    if scene_changes is None:
+        scene_changes = detect_scene_changes(video_path)
     keyword_regions = score_transcript_keywords(words, config.tiktok_keywords)
 
     # Determine video duration
@@ -197,7 +421,9 @@ def find_highlights(
 
     # Apply non-maximum suppression and boundary refinement
     selected = _select_top_clips(candidates, max_clips, min_dur, max_dur)
-    selected = [_refine_boundaries(c, words, min_dur, max_dur) for c in selected]
+    word_starts = np.array([w.start for w in words])
+    word_ends = np.array([w.end for w in words])
+    selected = [_refine_boundaries(c, word_starts, word_ends, min_dur, max_dur) for c in selected]
 
     logger.info("Selected %d highlight clips", len(selected))
     return selected
@@ -214,119 +440,142 @@ def _score_windows(
     max_dur: float,
     config,
 ) -> list:
-    """Score all possible clip windows using the three signals."""
+    """
+    Score all possible clip windows using the three signals.
+
+    All windows of one size are scored in a handful of numpy calls: a
+    prefix sum over the normalized rms curve answers any window's mean
+    energy in O(1), and searchsorted against the sorted scene timestamps
+    answers its scene count — no per-window masking or Python scans.
+    """
     candidates = []
     step = 5.0  # step size in seconds for window sliding
 
     # Precompute global stats for normalization
-    global_max_rms = float(np.max(rms)) if len(rms) > 0 else 1.0
-    global_min_rms = float(np.min(rms)) if len(rms) > 0 else 0.0
-    rms_range = global_max_rms - global_min_rms or 1.0
+    if len(rms) > 0:
+        global_min_rms = float(np.min(rms))
+        rms_range = (float(np.max(rms)) - global_min_rms) or 1.0
+        rms_cum = np.concatenate(([0.0], np.cumsum((rms - global_min_rms) / rms_range)))
+    scene_arr = np.sort(np.asarray(scene_changes, dtype=np.float64))
 
     for window_size in [min_dur, (min_dur + max_dur) // 2, max_dur]:
-        pos = 0.0
-        while pos + window_size <= duration:
-            end = pos + window_size
-
-            # Signal 1: Audio energy
-            if len(times) > 0:
-                mask = (times >= pos) & (times < end)
-                window_rms = rms[mask]
-                energy_score = float(np.mean((window_rms - global_min_rms) / rms_range)) if len(window_rms) > 0 else 0.0
-            else:
-                energy_score = 0.0
-
-            # Signal 2: Keyword density
-            kw_score = 0.0
-            for ks, ke, kd in keyword_regions:
-                if ks >= pos and ke <= end:
-                    kw_score = max(kw_score, kd)
-            kw_score = min(1.0, kw_score * 3)
-
-            # Signal 3: Scene changes
-            scenes_in_window = [t for t in scene_changes if pos <= t < end]
-            scene_score = min(1.0, len(scenes_in_window) / 2)
-
-            combined = (
-                config.audio_energy_weight * energy_score
-                + config.keyword_weight * kw_score
-                + config.scene_change_weight * scene_score
+        starts = np.arange(0.0, duration - window_size + 1e-9, step)
+        if starts.size == 0:
+            continue
+        ends = starts + window_size
+
+        # Signal 1: Audio energy (windowed mean via prefix-sum differences)
+        if len(rms) > 0:
+            i0 = np.searchsorted(times, starts, side="left")
+            i1 = np.searchsorted(times, ends, side="left")
+            counts = i1 - i0
+            energy_scores = np.where(
+                counts > 0,
+                (rms_cum[i1] - rms_cum[i0]) / np.maximum(counts, 1),
+                0.0,
             )
+        else:
+            energy_scores = np.zeros(starts.size)
+
+        # Signal 2: Keyword density (max over regions fully inside a window)
+        kw_scores = np.zeros(starts.size)
+        for ks, ke, kd in keyword_regions:
+            inside = (starts <= ks) & (ke <= ends)
+            np.maximum(kw_scores, np.where(inside, kd, 0.0), out=kw_scores)
+        kw_scores = np.minimum(1.0, kw_scores * 3)
+
+        # Signal 3: Scene changes in [start, end)
+        scene_counts = (
+            np.searchsorted(scene_arr, ends, side="left")
+            - np.searchsorted(scene_arr, starts, side="left")
+        )
+        scene_scores = np.minimum(1.0, scene_counts / 2)
+
+        combined = (
+            config.audio_energy_weight * energy_scores
+            + config.keyword_weight * kw_scores
+            + config.scene_change_weight * scene_scores
+        )
 
+        for j in range(starts.size):
             reason_parts = []
-            if energy_score > 0.6:
+            if energy_scores[j] > 0.6:
                 reason_parts.append("high energy")
-            if kw_score > 0.3:
+            if kw_scores[j] > 0.3:
                 reason_parts.append("keyword")
-            if scene_score > 0.5:
+            if scene_scores[j] > 0.5:
                 reason_parts.append("scene change")
             reason = ", ".join(reason_parts) if reason_parts else "multi-signal"
 
             candidates.append(ClipCandidate(
-                start=pos,
-                end=end,
-                score=combined,
+                start=float(starts[j]),
+                end=float(ends[j]),
+                score=float(combined[j]),
                 reason=reason,
             ))
 
-            pos += step
-
     return candidates
 
 
 def _select_top_clips(candidates: list, max_clips: int, min_dur: float, max_dur: float) -> list:
     """
     Non-maximum suppression: select top-scoring non-overlapping clips.
+    Each candidate is checked against the whole selected set in one numpy
+    broadcast instead of a Python pairwise loop — candidate counts reach
+    thousands on long videos (three window sizes, 5 s steps).
     """
     valid = [c for c in candidates if min_dur <= (c.end - c.start) <= max_dur]
     valid.sort(key=lambda c: c.score, reverse=True)
 
+    sel_starts = np.empty(max_clips)
+    sel_ends = np.empty(max_clips)
     selected = []
     for candidate in valid:
-        overlaps = False
-        for sel in selected:
-            overlap_start = max(candidate.start, sel.start)
-            overlap_end = min(candidate.end, sel.end)
-            if overlap_end > overlap_start:
-                overlap_dur = overlap_end - overlap_start
-                candidate_dur = candidate.end - candidate.start
-                if overlap_dur > 0.5 * candidate_dur:
-                    overlaps = True
-                    break
-        if not overlaps:
-            selected.append(candidate)
+        n_sel = len(selected)
+        if n_sel:
+            overlap = np.minimum(candidate.end, sel_ends[:n_sel]) - np.maximum(
+                candidate.start, sel_starts[:n_sel]
+            )
+            # Reject if any selected clip covers >50% of this candidate
+            if overlap.max() > 0.5 * (candidate.end - candidate.start):
+                continue
+        sel_starts[n_sel] = candidate.start
+        sel_ends[n_sel] = candidate.end
+        selected.append(candidate)
         if len(selected) >= max_clips:
             break
 
     return selected
 
 
-def _refine_boundaries(clip: ClipCandidate, words: list, min_dur: float, max_dur: float) -> ClipCandidate:
+def _snap_to_nearest(sorted_times: np.ndarray, target: float, tolerance: float = 2.0) -> float:
+    """Snap target to the closest value in a sorted array, within tolerance."""
+    idx = np.searchsorted(sorted_times, target)
+    neighbors = sorted_times[max(idx - 1, 0):idx + 1]
+    if len(neighbors) == 0:
+        return target
+    diffs = np.abs(neighbors - target)
+    best = int(np.argmin(diffs))
+    return float(neighbors[best]) if diffs[best] <= tolerance else target
+
+
+def _refine_boundaries(
+    clip: ClipCandidate,
+    word_starts: np.ndarray,
+    word_ends: np.ndarray,
+    min_dur: float,
+    max_dur: float,
+) -> ClipCandidate:
     """
-    Snap clip boundaries to nearest sentence/word boundaries in the transcript.
+    Snap clip boundaries to nearest word boundaries in the transcript (±2 s).
+    The word timestamp arrays are sorted, so each snap is a binary search
+    plus a two-element comparison instead of a scan over every word.
     """
-    if not words:
+    if len(word_starts) == 0:
         return clip
 
-    # Find words near the clip start - snap to nearest word boundary (±2s)
-    start = clip.start
-    end = clip.end
-
-    # Find the closest word start near clip.start
-    best_start_diff = float("inf")
-    for word in words:
-        diff = abs(word.start - start)
-        if diff < best_start_diff and diff <= 2.0:
-            best_start_diff = diff
-            start = word.start
-
-    # Find the closest word end near clip.end (prefer end of sentence)
-    best_end_diff = float("inf")
-    for word in words:
-        diff = abs(word.end - end)
-        if diff < best_end_diff and diff <= 2.0:
-            best_end_diff = diff
-            end = word.end
+    start = _snap_to_nearest(word_starts, clip.start)
+    end = _snap_to_nearest(word_ends, clip.end)
 
     # Enforce duration bounds
     dur = end - start
@@ -6,15 +6,23 @@ Uses a two-layer approach for word-by-word highlighting:
   Layer 1: One dialogue event per word, highlighted in yellow with full line context
 """
 import logging
+from bisect import bisect_left
+from functools import lru_cache
 from pathlib import Path
-from dataclasses import dataclass
+from dataclasses import astuple, dataclass
 
 from utils.file_utils import seconds_to_ass_time
+from utils._time_kernels import seconds_to_ass_time_bulk
 
 logger = logging.getLogger(__name__)
 
 WORDS_PER_LINE = 4
 
+# Each word's end timestamp is usually the next word's start, so every
+# formatted time is requested at least twice per clip; memoizing skips the
+# repeated format work.
+_fmt_ass_time = lru_cache(maxsize=4096)(seconds_to_ass_time)
+
 
 @dataclass
 class SubtitleStyle:
@@ -47,46 +55,73 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
 """
 
 
+# Formatted headers keyed by style fields — the default style means one
+# .format() on the 700-char template per process instead of one per clip.
+_HEADER_CACHE: dict = {}
+
+
+def _get_header(style: SubtitleStyle) -> str:
+    key = astuple(style)
+    header = _HEADER_CACHE.get(key)
+    if header is None:
+        header = _ASS_HEADER.format(
+            font_name=style.font_name,
+            font_size=style.font_size,
+            primary=style.primary_color,
+            secondary=style.primary_color,
+            outline=style.outline_color,
+            shadow=style.shadow_color,
+            bold=style.bold,
+            outline_w=style.outline_width,
+            shadow_d=style.shadow_depth,
+            margin_v=style.margin_v,
+        )
+        _HEADER_CACHE[key] = header
+    return header
+
+
 def generate_ass_file(
     words: list,
     output_path: Path,
     clip_start: float,
     clip_end: float,
     style: SubtitleStyle = None,
+    word_starts: list = None,
 ) -> Path:
     """
     Generate a .ass subtitle file for the given clip window [clip_start, clip_end].
     Times are re-offset relative to clip_start so the clip starts at 0:00:00.
 
+    `word_starts` is the sorted list of word start times; callers producing
+    several clips from one transcript pass it so each clip's words are found
+    by binary search instead of scanning the whole transcript per clip.
+
     Returns the path to the generated .ass file.
     """
+    from pipeline.transcriber import WordSegment
+
     if style is None:
         style = SubtitleStyle()
 
-    # Filter and re-offset words to clip-relative time
-    clip_words = []
-    for w in words:
-        if w.start >= clip_start and w.end <= clip_end + 0.5:
-            from pipeline.transcriber import WordSegment
-            clip_words.append(WordSegment(
-                word=w.word,
-                start=w.start - clip_start,
-                end=w.end - clip_start,
-                probability=w.probability,
-            ))
-
-    header = _ASS_HEADER.format(
-        font_name=style.font_name,
-        font_size=style.font_size,
-        primary=style.primary_color,
-        secondary=style.primary_color,
-        outline=style.outline_color,
-        shadow=style.shadow_color,
-        bold=style.bold,
-        outline_w=style.outline_width,
-        shadow_d=style.shadow_depth,
-        margin_v=style.margin_v,
-    )
+    if word_starts is None:
+        word_starts = [w.start for w in words]
+
+    # Narrow to the clip window by bisect, then re-offset to clip-relative
+    # time (the w.end check trims words that start inside but overrun it)
+    lo = bisect_left(word_starts, clip_start)
+    hi = bisect_left(word_starts, clip_end + 0.5)
+    clip_words = [
+        WordSegment(
+            word=w.word,
+            start=w.start - clip_start,
+            end=w.end - clip_start,
+            probability=w.probability,
+        )
+        for w in words[lo:hi]
+        if w.end <= clip_end + 0.5
+    ]
+
+    header = _get_header(style)
 
     dialogue_lines = _build_dialogue_lines(clip_words, style)
 
@@ -117,42 +152,51 @@ def _build_dialogue_lines(words: list, style: SubtitleStyle) -> list:
     if not words:
         return []
 
+    # Hoisted per-clip constants: the color-override tokens never change
+    # between words, and each word only needs stripping once — not once per
+    # dialogue event it appears in (every word shows up in len(group) lines).
+    hi_open = f"{{\\c{style.highlight_color}&}}"
+    hi_close = f"{{\\c{style.primary_color}&}}"
+
     groups = _group_words_into_lines(words)
-    lines = []
 
+    # Gather every cue timestamp for the clip and format them in one bulk
+    # pass (numba kernel when available). Per group the times are each word
+    # start plus one trailing end, so event i reads [base+i, base+i+1].
+    all_times = []
+    group_offsets = []
     for group in groups:
+        group_offsets.append(len(all_times))
+        all_times.extend(w.start for w in group)
+        if group:
+            all_times.append(group[-1].end + 0.3)
+    formatted = seconds_to_ass_time_bulk(all_times, scalar=_fmt_ass_time)
+
+    lines = []
+    for base, group in zip(group_offsets, groups):
         if not group:
             continue
 
-        # One event per word: full line with that word highlighted
-        for i, word in enumerate(group):
-            w_start = seconds_to_ass_time(word.start)
-            # Keep showing until next word starts (or +0.3 s after last word)
-            if i < len(group) - 1:
-                w_end = seconds_to_ass_time(group[i + 1].start)
-            else:
-                w_end = seconds_to_ass_time(word.end + 0.3)
+        texts = [w.word.strip() for w in group]
 
-            highlighted_text = _build_highlighted_line(group, i, style)
+        # One event per word: full line with that word highlighted, shown
+        # until the next word starts (or +0.3 s after the last word)
+        for i in range(len(group)):
+            highlighted_text = _build_highlighted_line(texts, i, hi_open, hi_close)
             lines.append(
-                f"Dialogue: 0,{w_start},{w_end},Default,,0,0,0,,{{\\an2}}{highlighted_text}"
+                f"Dialogue: 0,{formatted[base + i]},{formatted[base + i + 1]},"
+                f"Default,,0,0,0,,{{\\an2}}{highlighted_text}"
             )
 
     return lines
 
 
-def _build_highlighted_line(group: list, highlight_index: int, style: SubtitleStyle) -> str:
+def _build_highlighted_line(texts: list, highlight_index: int, hi_open: str, hi_close: str) -> str:
     """
-    Reconstruct a full line where only the word at highlight_index is yellow.
-    Other words remain white.
+    Reconstruct a full line where only the word at highlight_index is yellow
+    (wrapped in the precomputed color-override tokens). Other words stay white.
 
     Example result: "Hello {\\c&H0000FFFF&}world{\\c&H00FFFFFF&} this works"
     """
-    parts = []
-    for i, word in enumerate(group):
-        text = word.word.strip()
-        if i == highlight_index:
-            parts.append(f"{{\\c{style.highlight_color}&}}{text}{{\\c{style.primary_color}&}}")
-        else:
-            parts.append(text)
-    return " ".join(parts)
+    i = highlight_index
+    return " ".join(texts[:i] + [hi_open + texts[i] + hi_close] + texts[i + 1:])
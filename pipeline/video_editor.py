@@ -1,6 +1,8 @@
 import json
 import logging
+import os
 import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from pathlib import Path
 
@@ -26,22 +28,105 @@ class VideoEditError(Exception):
         super().__init__(message)
 
 
+# Hardware H.264 encoders in preference order, each with the flags that map
+# a CRF-style quality value onto that encoder's rate control.
+_HW_ENCODER_FLAGS = {
+    "h264_nvenc": lambda q: ["-c:v", "h264_nvenc", "-rc", "vbr", "-cq", str(q)],
+    "h264_qsv": lambda q: ["-c:v", "h264_qsv", "-global_quality", str(q)],
+    "h264_videotoolbox": lambda q: ["-c:v", "h264_videotoolbox", "-q:v", str(q)],
+    "h264_vaapi": lambda q: ["-c:v", "h264_vaapi", "-qp", str(q)],
+}
+
+_UNSET = object()
+_hw_encoder = _UNSET  # resolved on first use; None = software only
+
+
+def _get_hw_encoder() -> str | None:
+    """
+    Detect the best available hardware H.264 encoder (once per process) by
+    scanning `ffmpeg -encoders`. Returns the encoder name or None.
+    """
+    global _hw_encoder
+    if _hw_encoder is _UNSET:
+        _hw_encoder = None
+        try:
+            result = subprocess.run(
+                ["ffmpeg", "-hide_banner", "-encoders"],
+                capture_output=True, text=True, timeout=30,
+            )
+            if result.returncode == 0:
+                for name in _HW_ENCODER_FLAGS:
+                    if f" {name} " in result.stdout:
+                        _hw_encoder = name
+                        logger.info("Using hardware encoder: %s", name)
+                        break
+        except (subprocess.TimeoutExpired, FileNotFoundError) as e:
+            logger.warning("Encoder detection failed: %s", e)
+    return _hw_encoder
+
+
+def _disable_hw_encoder() -> None:
+    """Drop to libx264 for the rest of the process (hw encoder rejected a job)."""
+    global _hw_encoder
+    if _hw_encoder:
+        logger.warning("Disabling hardware encoder %s, using libx264", _hw_encoder)
+    _hw_encoder = None
+
+
+def _encoder_args(crf: int, software: bool = False) -> list:
+    """Video-encoder flags: the detected hardware encoder, or libx264."""
+    encoder = None if software else _get_hw_encoder()
+    if encoder is not None:
+        return _HW_ENCODER_FLAGS[encoder](crf)
+    return ["-c:v", "libx264", "-preset", "fast", "-crf", str(crf)]
+
+
+def _get_video_dimensions_pyav(video_path: Path) -> tuple | None:
+    """
+    Read width/height from the container header via PyAV (in-process, no
+    ffprobe fork+exec). Returns None if PyAV is unavailable or parsing fails.
+    """
+    try:
+        import av
+    except ImportError:
+        return None
+    try:
+        with av.open(str(video_path)) as container:
+            stream = container.streams.video[0]
+            w, h = stream.width, stream.height
+            rotate = int(stream.metadata.get("rotate", 0))
+            if rotate in (90, 270, -90, -270):
+                w, h = h, w
+            return w, h
+    except (av.AVError, IndexError, ValueError) as e:
+        logger.warning("PyAV probe failed, falling back to ffprobe: %s", e)
+        return None
+
+
 def get_video_dimensions(video_path: Path) -> tuple:
     """
-    Use ffprobe to get the display width and height of the video.
+    Get the display width and height of the video. Prefers an in-process
+    PyAV header read (avoids a subprocess spawn per call); falls back to
+    ffprobe when PyAV isn't installed.
     Respects rotation metadata: mobile-shot videos (TikTok, Instagram, etc.)
     are often stored as landscape (e.g. 1920x1080) with a 90° or 270° rotate
     tag. We swap w/h in that case so the crop math works correctly.
     """
+    dims = _get_video_dimensions_pyav(video_path)
+    if dims is not None:
+        return dims
+
     cmd = [
         "ffprobe", "-v", "error",
         "-select_streams", "v:0",
-        "-show_entries", "stream=width,height,tags",
+        # Only the fields we read — skips full stream enumeration
+        "-show_entries", "stream=width,height:stream_tags=rotate",
         "-of", "json",
         str(video_path),
     ]
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+        # json.loads accepts bytes directly; no need to decode all of stdout
+        result = subprocess.run(cmd, capture_output=True, timeout=30)
         if result.returncode == 0 and result.stdout.strip():
             data = json.loads(result.stdout)
             streams = data.get("streams", [])
@@ -99,13 +184,20 @@ def build_ffmpeg_command(
     crf: int = 23,
     target_w: int = 1080,
     target_h: int = 1920,
+    crop_filter: str = None,
+    software: bool = False,
 ) -> list:
     """
     Build a single-pass FFmpeg command: cut + crop to 9:16 + burn subtitles.
     Uses fast seek (-ss before -i) for speed.
+
+    `crop_filter` may be precomputed by the caller (the source dimensions
+    don't change between clips of the same video); when omitted it is
+    derived here with one probe.
     """
-    src_w, src_h = get_video_dimensions(video_path)
-    crop_filter = calculate_crop_filter(src_w, src_h, target_w, target_h)
+    if crop_filter is None:
+        src_w, src_h = get_video_dimensions(video_path)
+        crop_filter = calculate_crop_filter(src_w, src_h, target_w, target_h)
 
     # Escape ASS path for FFmpeg filter (handle Windows backslashes and colons)
     ass_escaped = str(ass_path).replace("\\", "/").replace(":", "\\:")
@@ -119,9 +211,7 @@ def build_ffmpeg_command(
         "-to", seconds_to_ffmpeg_time(end),
         "-i", str(video_path),
         "-vf", vf,
-        "-c:v", "libx264",
-        "-preset", "fast",
-        "-crf", str(crf),
+        *_encoder_args(crf, software=software),
         "-c:a", "aac",
         "-b:a", "128k",
         "-movflags", "+faststart",
@@ -137,15 +227,25 @@ def process_clip(
     start: float,
     end: float,
     max_size_mb: float = 48.0,
+    crop_filter: str = None,
 ) -> ClipResult:
     """
     Create a single clip: cut, crop to 9:16, burn subtitles.
     If the result is over max_size_mb, re-encode at lower quality (crf=28).
     """
-    cmd = build_ffmpeg_command(video_path, ass_path, output_path, start, end, crf=23)
+    cmd = build_ffmpeg_command(video_path, ass_path, output_path, start, end, crf=23, crop_filter=crop_filter)
     logger.info("Creating clip %.1fs-%.1fs: %s", start, end, output_path.name)
 
     result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+    if result.returncode != 0 and _get_hw_encoder() is not None:
+        # Hardware encoders can reject filter chains or exotic sources that
+        # libx264 handles fine; retry in software and stay there.
+        _disable_hw_encoder()
+        cmd = build_ffmpeg_command(
+            video_path, ass_path, output_path, start, end, crf=23,
+            crop_filter=crop_filter, software=True,
+        )
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
     if result.returncode != 0:
         logger.error("FFmpeg stderr: %s", result.stderr[-2000:])
         raise VideoEditError(
@@ -158,7 +258,7 @@ def process_clip(
     size_mb = get_file_size_mb(output_path)
     if size_mb > max_size_mb:
         logger.warning("Clip %.1f MB > limit %.1f MB, re-encoding at lower quality", size_mb, max_size_mb)
-        cmd_lq = build_ffmpeg_command(video_path, ass_path, output_path, start, end, crf=28)
+        cmd_lq = build_ffmpeg_command(video_path, ass_path, output_path, start, end, crf=28, crop_filter=crop_filter)
         result = subprocess.run(cmd_lq, capture_output=True, text=True, timeout=300)
         if result.returncode != 0:
             raise VideoEditError(
@@ -178,6 +278,84 @@ def process_clip(
     )
 
 
+def _build_fused_command(video_path: Path, jobs: list, crop_filter: str, crf: int = 23) -> list:
+    """
+    Build one FFmpeg command that cuts every clip as a separate output of a
+    single input. jobs is a list of (index, ass_path, output_path, start, end).
+
+    Each output cuts with trim/atrim + setpts/asetpts inside its filtergraph
+    rather than output-side -ss/-to: the .ass files carry clip-relative cue
+    times (the clip starts at 0:00:00), and only a PTS reset ahead of the
+    ass filter makes the frames it sees start at 0 too. With output-side
+    seeking the frames keep input-timeline timestamps, so the cues would be
+    rendered onto the start of the source and then discarded by the seek.
+    """
+    cmd = ["ffmpeg", "-y", "-i", str(video_path)]
+    for _, ass_path, output_path, start, end in jobs:
+        ass_escaped = str(ass_path).replace("\\", "/").replace(":", "\\:")
+        cut = f"start={start:.3f}:end={end:.3f}"
+        cmd += [
+            "-vf", f"trim={cut},setpts=PTS-STARTPTS,{crop_filter},ass='{ass_escaped}'",
+            "-af", f"atrim={cut},asetpts=PTS-STARTPTS",
+            *_encoder_args(crf),
+            "-c:a", "aac",
+            "-b:a", "128k",
+            "-movflags", "+faststart",
+            str(output_path),
+        ]
+    return cmd
+
+
+def _process_clips_fused(
+    video_path: Path,
+    jobs: list,
+    crop_filter: str,
+    max_size_mb: float = 48.0,
+) -> list:
+    """
+    Encode all clips in one FFmpeg invocation (container open, header parse,
+    and demux amortized once across outputs). Oversized outputs go through
+    the usual low-quality re-encode individually. Raises VideoEditError if
+    the fused run fails; the caller falls back to per-clip encoding.
+    """
+    cmd = _build_fused_command(video_path, jobs, crop_filter, crf=23)
+    logger.info("Creating %d clips in one FFmpeg pass", len(jobs))
+
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=300 * len(jobs))
+    if result.returncode != 0:
+        logger.error("Fused FFmpeg pass failed: %s", result.stderr[-2000:])
+        raise VideoEditError(
+            f"Fused FFmpeg pass failed with code {result.returncode}",
+            stderr=result.stderr,
+        )
+
+    results = []
+    for idx, ass_path, output_path, start, end in jobs:
+        size_mb = get_file_size_mb(output_path)
+        if size_mb > max_size_mb:
+            logger.warning("Clip %.1f MB > limit %.1f MB, re-encoding at lower quality", size_mb, max_size_mb)
+            cmd_lq = build_ffmpeg_command(
+                video_path, ass_path, output_path, start, end, crf=28, crop_filter=crop_filter
+            )
+            lq = subprocess.run(cmd_lq, capture_output=True, text=True, timeout=300)
+            if lq.returncode != 0:
+                raise VideoEditError(
+                    "Low-quality re-encode failed",
+                    stderr=lq.stderr,
+                    user_message="Failed to compress clip to fit Telegram's file limit.",
+                )
+            size_mb = get_file_size_mb(output_path)
+        results.append(ClipResult(
+            path=output_path,
+            duration=end - start,
+            start_time=start,
+            end_time=end,
+            clip_index=idx,
+            file_size_mb=size_mb,
+        ))
+    return results
+
+
 def process_all_clips(
     video_path: Path,
     candidates: list,
@@ -192,31 +370,96 @@ def process_all_clips(
     from pipeline.subtitle_styler import generate_ass_file
 
     output_dir.mkdir(parents=True, exist_ok=True)
-    results = []
 
+    # Source dimensions are identical for every clip of this video; probe
+    # once and reuse the crop filter instead of forking ffprobe per clip.
+    src_w, src_h = get_video_dimensions(video_path)
+    crop_filter = calculate_crop_filter(src_w, src_h)
+
+    # Sorted start times let generate_ass_file bisect out each clip's words
+    # instead of filtering the whole transcript per clip.
+    word_starts = [w.start for w in words]
+
+    jobs = []
     for i, candidate in enumerate(candidates, start=1):
         clip_output = output_dir / f"clip_{i:02d}.mp4"
         ass_output = output_dir / f"clip_{i:02d}.ass"
-
         try:
             generate_ass_file(
                 words=words,
                 output_path=ass_output,
                 clip_start=candidate.start,
                 clip_end=candidate.end,
+                word_starts=word_starts,
             )
-            clip = process_clip(
-                video_path=video_path,
-                ass_path=ass_output,
-                output_path=clip_output,
-                start=candidate.start,
-                end=candidate.end,
-            )
-            clip.clip_index = i
+        except Exception as e:
+            logger.error("Failed to create subtitles for clip %d: %s", i, e)
+            continue
+        # Carry the candidate's own index: filenames, clip_index and the
+        # caption lookup in bot.py all key off the candidate position, which
+        # must survive a failed subtitle job shifting positions in `jobs`.
+        jobs.append((i, ass_output, clip_output, candidate.start, candidate.end))
+
+    # With three or more clips the shared demux/encoder init of a fused run
+    # beats per-clip fast seek — but the fused command seeks on the output
+    # side, so ffmpeg decodes the source from 0 up to the last clip's end.
+    # For highlights near the end of a long video that would decode far more
+    # footage than the clips contain; only fuse when the decoded span stays
+    # within ~2x the clip footage. Spread-out clips (and one or two clips,
+    # where fast seek wins outright) take the per-clip path below.
+    total_clip_dur = sum(end - start for _, _, _, start, end in jobs)
+    decode_span = max((end for _, _, _, _, end in jobs), default=0.0)
+    if len(jobs) >= 3 and decode_span <= 2.0 * total_clip_dur:
+        try:
+            results = _process_clips_fused(video_path, jobs, crop_filter)
+            for clip in results:
+                logger.info("Clip %d/%d done: %.1f MB", clip.clip_index, len(candidates), clip.file_size_mb)
+            return results
+        except (VideoEditError, subprocess.TimeoutExpired) as e:
+            logger.warning("Fused encode failed (%s), falling back to per-clip encoding", e)
+
+    def _encode_one(idx: int, ass_output: Path, clip_output: Path, start: float, end: float) -> ClipResult:
+        clip = process_clip(
+            video_path=video_path,
+            ass_path=ass_output,
+            output_path=clip_output,
+            start=start,
+            end=end,
+            crop_filter=crop_filter,
+        )
+        clip.clip_index = idx
+        return clip
+
+    # Overlap independent ffmpeg runs. Threads suffice — the encode happens
+    # in the subprocess, the Python side just waits on it — and cpu_count//2
+    # workers keep libx264's own thread pools from thrashing each other.
+    # Skipped with a hardware encoder (one fixed-function engine to share).
+    max_workers = min(len(jobs), max(1, (os.cpu_count() or 2) // 2))
+    results = []
+    if config.parallel_clips and len(jobs) > 1 and max_workers > 1 and _get_hw_encoder() is None:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(_encode_one, *job): job[0]
+                for job in jobs
+            }
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    clip = future.result()
+                    results.append(clip)
+                    logger.info("Clip %d/%d done: %.1f MB", i, len(candidates), clip.file_size_mb)
+                except Exception as e:
+                    logger.error("Failed to create clip %d: %s", i, e)
+        results.sort(key=lambda c: c.clip_index)
+        return results
+
+    for job in jobs:
+        try:
+            clip = _encode_one(*job)
             results.append(clip)
-            logger.info("Clip %d/%d done: %.1f MB", i, len(candidates), clip.file_size_mb)
+            logger.info("Clip %d/%d done: %.1f MB", clip.clip_index, len(candidates), clip.file_size_mb)
 
         except (VideoEditError, Exception) as e:
-            logger.error("Failed to create clip %d: %s", i, e)
+            logger.error("Failed to create clip %d: %s", job[0], e)
 
     return results
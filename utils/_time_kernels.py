@@ -0,0 +1,49 @@
+"""
+Bulk timestamp formatting for subtitle generation.
+
+A numba kernel splits a whole array of cue times into H/M/S/centisecond
+fields in one native loop; string assembly then just indexes the pad
+tables. Everything degrades to the scalar formatter when numba is not
+installed or the batch is too small to be worth an array round trip.
+"""
+import numpy as np
+
+from utils.file_utils import _PAD2, seconds_to_ass_time
+
+
+def _hms_cs_kernel(secs, fields):
+    for i in range(secs.shape[0]):
+        # Round to centiseconds before splitting, exactly like the scalar
+        # path (seconds_to_ass_time goes through round(seconds, 2)), so the
+        # output doesn't depend on whether this kernel or the scalar ran.
+        x = round(secs[i], 2)
+        total = int(x)
+        m = total // 60
+        h = m // 60
+        fields[i, 0] = h
+        fields[i, 1] = m - h * 60
+        fields[i, 2] = total - m * 60
+        fields[i, 3] = int((x - total) * 100)
+
+
+try:
+    from numba import njit
+    _hms_cs_kernel = njit(cache=True)(_hms_cs_kernel)
+    _HAVE_NUMBA = True
+except ImportError:
+    _HAVE_NUMBA = False
+
+
+def seconds_to_ass_time_bulk(times, scalar=seconds_to_ass_time) -> list:
+    """
+    Format a sequence of seconds as ASS "H:MM:SS.cs" strings.
+    `scalar` is the per-value formatter used when the kernel isn't worth it
+    (callers may pass a memoized variant).
+    """
+    if not _HAVE_NUMBA or len(times) < 32:
+        return [scalar(t) for t in times]
+
+    secs = np.asarray(times, dtype=np.float64)
+    fields = np.empty((secs.shape[0], 4), dtype=np.int64)
+    _hms_cs_kernel(secs, fields)
+    return [f"{h}:{_PAD2[m]}:{_PAD2[s]}.{_PAD2[cs]}" for h, m, s, cs in fields]